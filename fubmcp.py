@@ -26,10 +26,12 @@ class FollowUpBossClient:
         
         self.api_key = api_key.strip()
         self.base_url = "https://api.followupboss.com/v1"
+        # Long-lived client: keep connections to FollowUp Boss warm for reuse
         self.client = httpx.AsyncClient(
             auth=(self.api_key, ""),
             timeout=30.0,
-            verify=True
+            verify=True,
+            limits=httpx.Limits(max_keepalive_connections=20)
         )
     
     async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
@@ -3,6 +3,7 @@
 Prompt injection protection for ElevenLabs MCP server
 Detects and blocks malicious prompts in user inputs
 """
+import functools
 import re
 import logging
 from typing import List, Dict, Any, Optional
@@ -10,7 +11,25 @@ from dataclasses import dataclass
 
 logger = logging.getLogger("prompt_security")
 
-@dataclass
+# The combined threat prefilter runs over every inbound field, so it is
+# compiled with RE2 (linear time, no backtracking) when google-re2 is installed
+try:
+    import re2 as _linear_re
+except ImportError:
+    _linear_re = re
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+_CODE_CHARS_RE = re.compile(r'[<>{}()[\]`]')
+_PUNCTUATION_RUN_RE = re.compile(r'[!@#$%^&*]{3,}')
+
+def _scoped(pattern: str) -> str:
+    """Wrap a pattern so it can sit inside an alternation with its flags intact"""
+    if pattern.startswith("(?i)"):
+        return "(?i:" + pattern[4:] + ")"
+    return "(?:" + pattern + ")"
+
+@dataclass(slots=True, frozen=True)
 class SecurityThreat:
     severity: str  # "high", "medium", "low"
     threat_type: str
@@ -76,17 +95,43 @@ class PromptInjectionDetector:
             r"(?i)(example|sample|demo|demonstration)",
             r"(?i)(help|assist|support|guidance)",
         ]
+        
+        # Compile once so every scan reuses the same pattern objects
+        self.high_risk_patterns = [re.compile(p) for p in self.high_risk_patterns]
+        self.medium_risk_patterns = [re.compile(p) for p in self.medium_risk_patterns]
+        self.low_risk_patterns = [re.compile(p) for p in self.low_risk_patterns]
+        
+        # All patterns as one alternation - a single search tells whether there
+        # is anything to report, so clean input skips the per-pattern passes
+        any_threat = "|".join(
+            _scoped(p.pattern)
+            for p in self.high_risk_patterns + self.medium_risk_patterns + self.low_risk_patterns
+        )
+        try:
+            self.any_threat_pattern = _linear_re.compile(any_threat)
+        except Exception as e:
+            # Outside the RE2 subset or its memory budget - the prefilter only
+            # answers "any match?", so the backtracking engine gives the same answer
+            logger.warning(f"RE2 rejected threat prefilter, using re: {e}")
+            self.any_threat_pattern = re.compile(any_threat)
+        
+        # Memoized scan() for inputs that repeat verbatim (patterns are fixed
+        # for the lifetime of the detector, so entries never go stale)
+        self.scan_cached = functools.lru_cache(maxsize=4096)(self.scan)
     
     def analyze_input(self, text: str, context: str = "") -> List[SecurityThreat]:
         """Analyze input for security threats"""
         if not text or not isinstance(text, str):
             return []
         
+        if not self.any_threat_pattern.search(text):
+            return []
+        
         threats = []
         
         # Check high-risk patterns
         for pattern in self.high_risk_patterns:
-            matches = re.finditer(pattern, text)
+            matches = pattern.finditer(text)
             for match in matches:
                 threats.append(SecurityThreat(
                     severity="high",
@@ -97,7 +142,7 @@ class PromptInjectionDetector:
         
         # Check medium-risk patterns
         for pattern in self.medium_risk_patterns:
-            matches = re.finditer(pattern, text)
+            matches = pattern.finditer(text)
             for match in matches:
                 threats.append(SecurityThreat(
                     severity="medium",
@@ -108,7 +153,7 @@ class PromptInjectionDetector:
         
         # Check low-risk patterns
         for pattern in self.low_risk_patterns:
-            matches = re.finditer(pattern, text)
+            matches = pattern.finditer(text)
             for match in matches:
                 threats.append(SecurityThreat(
                     severity="low",
@@ -128,14 +173,14 @@ class PromptInjectionDetector:
         sanitized = text
         
         # Remove excessive whitespace and control characters
-        sanitized = re.sub(r'\s+', ' ', sanitized)
-        sanitized = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', sanitized)
+        sanitized = _WHITESPACE_RE.sub(' ', sanitized)
+        sanitized = _CONTROL_CHARS_RE.sub('', sanitized)
         
         # Remove potential code injection patterns
-        sanitized = re.sub(r'[<>{}()[\]`]', '', sanitized)
+        sanitized = _CODE_CHARS_RE.sub('', sanitized)
         
         # Remove excessive punctuation
-        sanitized = re.sub(r'[!@#$%^&*]{3,}', '', sanitized)
+        sanitized = _PUNCTUATION_RUN_RE.sub('', sanitized)
         
         # Limit length
         sanitized = sanitized[:max_length]
@@ -146,19 +191,60 @@ class PromptInjectionDetector:
         """Check if input is safe to process"""
         threats = self.analyze_input(text, context)
         
+        # Split matches by severity in a single pass
+        high_risk_matches = []
+        medium_risk_matches = []
+        for t in threats:
+            if t.severity == "high":
+                high_risk_matches.append(t.matched_text)
+            elif t.severity == "medium":
+                medium_risk_matches.append(t.matched_text)
+        
         # Block if any high-risk threats found
-        high_risk_threats = [t for t in threats if t.severity == "high"]
-        if high_risk_threats:
-            logger.warning(f"High-risk prompt injection blocked in {context}: {[t.matched_text for t in high_risk_threats]}")
+        if high_risk_matches:
+            logger.warning(f"High-risk prompt injection blocked in {context}: {high_risk_matches}")
             return False, threats
         
         # Warn about medium-risk threats but allow
-        medium_risk_threats = [t for t in threats if t.severity == "medium"]
-        if medium_risk_threats:
-            logger.warning(f"Medium-risk content detected in {context}: {[t.matched_text for t in medium_risk_threats]}")
+        if medium_risk_matches:
+            logger.warning(f"Medium-risk content detected in {context}: {medium_risk_matches}")
         
         return True, threats
 
+    def scan(self, text: str, context: str = "") -> tuple[bool, int, int]:
+        """Check input without building threat objects - returns (is_safe, threat_count, high_risk_count)"""
+        if not text or not isinstance(text, str):
+            return True, 0, 0
+        if not self.any_threat_pattern.search(text):
+            return True, 0, 0
+        
+        high_risk_matches, medium_risk_matches, low_risk_count = self._match_by_severity(text)
+        
+        # Same blocking and warning rules as is_safe_input()
+        if high_risk_matches:
+            logger.warning(f"High-risk prompt injection blocked in {context}: {high_risk_matches}")
+        elif medium_risk_matches:
+            logger.warning(f"Medium-risk content detected in {context}: {medium_risk_matches}")
+        
+        high_risk_count = len(high_risk_matches)
+        threat_count = high_risk_count + len(medium_risk_matches) + low_risk_count
+        return high_risk_count == 0, threat_count, high_risk_count
+    
+    def scan_batch(self, texts: List[str], context: str = "") -> List[tuple[bool, int, int]]:
+        """Cached scan() over several inputs in one call"""
+        return [self.scan_cached(text, context) for text in texts]
+    
+    def _match_by_severity(self, text: str) -> tuple[List[str], List[str], int]:
+        """Matched text grouped by severity - (high, medium, low-risk count)"""
+        high_risk_matches = [m.group() for p in self.high_risk_patterns for m in p.finditer(text)]
+        medium_risk_matches = [m.group() for p in self.medium_risk_patterns for m in p.finditer(text)]
+        return high_risk_matches, medium_risk_matches, self._count_matches(self.low_risk_patterns, text)
+    
+    @staticmethod
+    def _count_matches(patterns: List[re.Pattern], text: str) -> int:
+        """Count non-overlapping matches across a list of patterns"""
+        return sum(1 for pattern in patterns for _ in pattern.finditer(text))
+
 # Global detector instance
 detector = PromptInjectionDetector()
 
@@ -168,28 +254,28 @@ def validate_call_data(call_data: Dict[str, Any]) -> tuple[bool, str, Dict[str,
     
     # Check caller name
     caller_name = call_data.get("caller_name", "")
-    is_safe, threats = detector.is_safe_input(caller_name, "caller_name")
+    is_safe, _, _ = detector.scan(caller_name, "caller_name")
     if not is_safe:
         return False, "Caller name contains suspicious content", {}
     sanitized_data["caller_name"] = detector.sanitize_input(caller_name, 100)
     
     # Check transcript
     transcript = call_data.get("transcript", "")
-    is_safe, threats = detector.is_safe_input(transcript, "transcript")
+    is_safe, _, _ = detector.scan(transcript, "transcript")
     if not is_safe:
         return False, "Transcript contains potential prompt injection", {}
     sanitized_data["transcript"] = detector.sanitize_input(transcript, 5000)
     
     # Check call summary
     call_summary = call_data.get("call_summary", "")
-    is_safe, threats = detector.is_safe_input(call_summary, "call_summary")
+    is_safe, _, _ = detector.scan(call_summary, "call_summary")
     if not is_safe:
         return False, "Call summary contains suspicious content", {}
     sanitized_data["call_summary"] = detector.sanitize_input(call_summary, 500)
     
     # Check call outcome
     call_outcome = call_data.get("call_outcome", "")
-    is_safe, threats = detector.is_safe_input(call_outcome, "call_outcome")
+    is_safe, _, _ = detector.scan(call_outcome, "call_outcome")
     if not is_safe:
         return False, "Call outcome contains suspicious content", {}
     sanitized_data["call_outcome"] = detector.sanitize_input(call_outcome, 50)
@@ -197,7 +283,7 @@ def validate_call_data(call_data: Dict[str, Any]) -> tuple[bool, str, Dict[str,
     # Check source
     source = call_data.get("source", "")
     if source:
-        is_safe, threats = detector.is_safe_input(source, "source")
+        is_safe, _, _ = detector.scan(source, "source")
         if not is_safe:
             return False, "Source contains suspicious content", {}
         sanitized_data["source"] = detector.sanitize_input(source, 50)
@@ -205,7 +291,7 @@ def validate_call_data(call_data: Dict[str, Any]) -> tuple[bool, str, Dict[str,
     # Check site county
     site_county = call_data.get("site_county", "")
     if site_county:
-        is_safe, threats = detector.is_safe_input(site_county, "site_county")
+        is_safe, _, _ = detector.scan(site_county, "site_county")
         if not is_safe:
             return False, "Site county contains suspicious content", {}
         sanitized_data["site_county"] = detector.sanitize_input(site_county, 100)
@@ -213,7 +299,7 @@ def validate_call_data(call_data: Dict[str, Any]) -> tuple[bool, str, Dict[str,
     # Check site state
     site_state = call_data.get("site_state", "")
     if site_state:
-        is_safe, threats = detector.is_safe_input(site_state, "site_state")
+        is_safe, _, _ = detector.scan(site_state, "site_state")
         if not is_safe:
             return False, "Site state contains suspicious content", {}
         sanitized_data["site_state"] = detector.sanitize_input(site_state, 50)
@@ -221,7 +307,7 @@ def validate_call_data(call_data: Dict[str, Any]) -> tuple[bool, str, Dict[str,
     # Check reference number
     reference_number = call_data.get("reference_number", "")
     if reference_number:
-        is_safe, threats = detector.is_safe_input(reference_number, "reference_number")
+        is_safe, _, _ = detector.scan(reference_number, "reference_number")
         if not is_safe:
             return False, "Reference number contains suspicious content", {}
         sanitized_data["reference_number"] = detector.sanitize_input(reference_number, 50)
@@ -229,7 +315,7 @@ def validate_call_data(call_data: Dict[str, Any]) -> tuple[bool, str, Dict[str,
     # Check acreage
     acreage = call_data.get("acreage", "")
     if acreage:
-        is_safe, threats = detector.is_safe_input(acreage, "acreage")
+        is_safe, _, _ = detector.scan(acreage, "acreage")
         if not is_safe:
             return False, "Acreage contains suspicious content", {}
         sanitized_data["acreage"] = detector.sanitize_input(acreage, 50)
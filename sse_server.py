@@ -4,21 +4,30 @@ SSE-compatible MCP server for ElevenLabs integration
 Exposes FollowUp Boss functionality via Server-Sent Events
 """
 import asyncio
-import json
 import os
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import orjson
 import uvicorn
 from fubmcp import FollowUpBossClient, app as mcp_app
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("sse_server")
 
+# SSE heartbeat cadence and the fixed start of each heartbeat frame
+HEARTBEAT_INTERVAL = 15
+HEARTBEAT_PREFIX = b'data: {"type":"heartbeat","timestamp":'
+CONNECTED_FRAME = b'data: {"type":"connected","message":"FollowUp Boss MCP Server connected"}\n\n'
+
 # Create FastAPI app for SSE endpoint
-sse_app = FastAPI(title="FollowUp Boss MCP SSE Server", version="1.0.0")
+sse_app = FastAPI(
+    title="FollowUp Boss MCP SSE Server",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
 
 # Add CORS middleware
 sse_app.add_middleware(
@@ -34,17 +43,21 @@ class MCPSSEHandler:
         self.api_key = os.getenv("FOLLOWUP_BOSS_API_KEY")
         if not self.api_key:
             raise ValueError("FOLLOWUP_BOSS_API_KEY environment variable not set")
+        # Tool schemas never change while the server runs - dumped on first tools/list
+        self._tools_cache: Optional[List[Dict[str, Any]]] = None
     
     async def handle_mcp_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Handle MCP protocol messages"""
         try:
             if message.get("method") == "tools/list":
                 # Return available tools
-                tools = await mcp_app._tool_handlers[0]()
+                if self._tools_cache is None:
+                    tools = await mcp_app._tool_handlers[0]()
+                    self._tools_cache = [tool.model_dump() for tool in tools]
                 return {
                     "jsonrpc": "2.0",
                     "id": message.get("id"),
-                    "result": {"tools": [tool.model_dump() for tool in tools]}
+                    "result": {"tools": self._tools_cache}
                 }
             
             elif message.get("method") == "tools/call":
@@ -109,13 +122,14 @@ async def sse_endpoint(request: Request):
     async def event_generator():
         try:
             # Send initial connection event
-            yield f"data: {json.dumps({'type': 'connected', 'message': 'FollowUp Boss MCP Server connected'})}\n\n"
+            yield CONNECTED_FRAME
             
             # Keep connection alive and handle any incoming messages
+            loop = asyncio.get_running_loop()
             while True:
-                await asyncio.sleep(1)
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
                 # Send heartbeat
-                yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': asyncio.get_event_loop().time()})}\n\n"
+                yield HEARTBEAT_PREFIX + str(loop.time()).encode() + b"}\n\n"
                 
         except asyncio.CancelledError:
             logger.info("SSE connection cancelled")
@@ -124,12 +138,13 @@ async def sse_endpoint(request: Request):
     
     return StreamingResponse(
         event_generator(),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Headers": "*",
+            "X-Accel-Buffering": "no",
         }
     )
 
@@ -137,7 +152,7 @@ async def sse_endpoint(request: Request):
 async def mcp_endpoint(request: Request):
     """Handle MCP JSON-RPC messages"""
     try:
-        message = await request.json()
+        message = orjson.loads(await request.body())
         logger.info(f"Received MCP message: {message}")
         
         response = await handler.handle_mcp_message(message)
@@ -161,4 +176,11 @@ async def health_check():
     return {"status": "healthy", "server": "followup-boss-mcp-sse"}
 
 if __name__ == "__main__":
-    uvicorn.run(sse_app, host="0.0.0.0", port=8002)
\ No newline at end of file
+    uvicorn.run(
+        sse_app,
+        host="0.0.0.0",
+        port=8002,
+        loop="uvloop",
+        http="httptools",
+        access_log=False
+    )
\ No newline at end of file
@@ -4,10 +4,13 @@ Webhook server for ElevenLabs integration
 Handles incoming webhooks and creates FollowUp Boss events
 """
 import os
+import re
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, Header
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import uvicorn
+import orjson
 import logging
 import hmac
 import hashlib
@@ -17,7 +20,44 @@ from fubmcp import FollowUpBossClient
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("webhook_server")
 
-app = FastAPI(title="ElevenLabs Webhook Handler", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one FollowUp Boss client (and its connection pool) across requests"""
+    api_key = os.getenv("FOLLOWUP_BOSS_API_KEY")
+    app.state.fub_client = FollowUpBossClient(api_key) if api_key else None
+    try:
+        yield
+    finally:
+        if app.state.fub_client is not None:
+            await app.state.fub_client.close()
+            app.state.fub_client = None
+
+app = FastAPI(title="ElevenLabs Webhook Handler", version="1.0.0", lifespan=lifespan)
+
+# Caller details spoken during a call
+PHONE_RE = re.compile(r"\b(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b")
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
+NAME_RE = re.compile(r"(?:my name is|i'm|this is|i am) ([a-z\s]+)", re.IGNORECASE)
+
+# FollowUp Boss note for a completed call
+NOTE_TEMPLATE = (
+    "📞 AI Call Summary\n\n"
+    "=== CALL DETAILS ===\n"
+    "Agent ID: {agent_id}\n"
+    "Conversation ID: {conversation_id}\n"
+    "Duration: {call_duration} seconds\n"
+    "Cost: ${call_cost:.2f}\n"
+    "Outcome: {call_outcome}\n\n"
+    "=== AI SUMMARY ===\n"
+    "{summary}\n\n"
+    "=== PROPERTY DETAILS ===\n"
+    "- County: {site_county}\n"
+    "- State: {site_state}\n"
+    "- Reference: {reference_number}\n"
+    "- Acreage: {acreage}\n\n"
+    "=== FULL TRANSCRIPT ===\n"
+    "{conversation_text}"
+)
 
 class TranscriptEntry(BaseModel):
     role: str
@@ -57,35 +97,25 @@ def extract_info_from_transcript(transcript: list) -> Dict[str, str]:
         "interested": True
     }
     
-    import re
-    
     for entry in transcript:
         if entry.get("role") == "user":
             message = entry.get("message", "").lower()
             
             # Extract name patterns
             if not extracted["name"]:
-                name_patterns = [
-                    r"my name is ([a-z\s]+)",
-                    r"i'm ([a-z\s]+)",
-                    r"this is ([a-z\s]+)",
-                    r"i am ([a-z\s]+)"
-                ]
-                for pattern in name_patterns:
-                    match = re.search(pattern, message, re.IGNORECASE)
-                    if match:
-                        extracted["name"] = match.group(1).strip().title()
-                        break
+                match = NAME_RE.search(message)
+                if match:
+                    extracted["name"] = match.group(1).strip().title()
             
             # Extract phone
             if not extracted["phone"]:
-                phone_match = re.search(r"\b(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b", message)
+                phone_match = PHONE_RE.search(message)
                 if phone_match:
                     extracted["phone"] = phone_match.group()
             
             # Extract email
             if not extracted["email"]:
-                email_match = re.search(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", message)
+                email_match = EMAIL_RE.search(message)
                 if email_match:
                     extracted["email"] = email_match.group()
             
@@ -104,9 +134,9 @@ async def handle_elevenlabs_webhook(
     """Handle incoming webhook from ElevenLabs"""
     # Get raw payload for signature verification
     payload = await request.body()
-    webhook_data = await request.json()
+    webhook_data = orjson.loads(payload)
     
-    logger.info(f"Received ElevenLabs webhook: {webhook_data}")
+    logger.info("Received ElevenLabs webhook: %s", webhook_data)
     
     # Verify webhook signature if secret is configured
     webhook_secret = os.getenv("ELEVENLABS_WEBHOOK_SECRET")
@@ -114,11 +144,10 @@ async def handle_elevenlabs_webhook(
         logger.error("Invalid webhook signature")
         raise HTTPException(status_code=401, detail="Invalid signature")
     
-    api_key = os.getenv("FOLLOWUP_BOSS_API_KEY")
-    if not api_key:
+    client = request.app.state.fub_client
+    if client is None:
         raise HTTPException(status_code=500, detail="FollowUp Boss API key not configured")
     
-    client = FollowUpBossClient(api_key)
     try:
         # Extract data from ElevenLabs webhook payload
         data = webhook_data.get("data", {})
@@ -162,12 +191,22 @@ async def handle_elevenlabs_webhook(
         source = dynamic_vars.get("source", "ElevenLabs AI Call")
         
         # Build conversation transcript
-        conversation_text = ""
+        # Stage keywords are checked per message while building the transcript,
+        # rather than rescanning the joined text afterwards
+        conversation_parts = []
+        seen_not_interested = False
+        seen_dnc = False
         for entry in transcript:
             role = entry.get("role", "unknown")
             message = entry.get("message", "")
             time_in_call = entry.get("time_in_call_secs", "")
-            conversation_text += f"[{time_in_call}s] {role.upper()}: {message}\n\n"
+            conversation_parts.append(f"[{time_in_call}s] {role.upper()}: {message}")
+            
+            if not seen_not_interested or not seen_dnc:
+                message_lower = message.lower()
+                seen_not_interested = seen_not_interested or "not interested" in message_lower
+                seen_dnc = seen_dnc or "do not call" in message_lower or "dnc" in message_lower
+        conversation_text = "\n\n".join(conversation_parts)
         
         # Get metadata
         call_duration = metadata.get("call_duration_secs", 0)
@@ -179,9 +218,9 @@ async def handle_elevenlabs_webhook(
         
         # Determine stage based on conversation
         stage = "Qualify"  # Default
-        if "not interested" in conversation_text.lower():
+        if seen_not_interested:
             stage = "Seller not interested"
-        elif "do not call" in conversation_text.lower() or "dnc" in conversation_text.lower():
+        elif seen_dnc:
             stage = "DNC"
         
         # Create event data for FollowUp Boss
@@ -198,31 +237,41 @@ async def handle_elevenlabs_webhook(
                 "customReferenceNumber": reference_number,
                 "customAcreage": acreage
             },
-            "note": f"📞 AI Call Summary\n\n=== CALL DETAILS ===\nAgent ID: {agent_id}\nConversation ID: {conversation_id}\nDuration: {call_duration} seconds\nCost: ${call_cost:.2f}\nOutcome: {call_outcome}\n\n=== AI SUMMARY ===\n{summary}\n\n=== PROPERTY DETAILS ===\n- County: {site_county if site_county else 'Not provided'}\n- State: {site_state if site_state else 'Not provided'}\n- Reference: {reference_number if reference_number else 'Not provided'}\n- Acreage: {acreage if acreage else 'Not provided'}\n\n=== FULL TRANSCRIPT ===\n{conversation_text}",
+            "note": NOTE_TEMPLATE.format_map({
+                "agent_id": agent_id,
+                "conversation_id": conversation_id,
+                "call_duration": call_duration,
+                "call_cost": call_cost,
+                "call_outcome": call_outcome,
+                "summary": summary,
+                "site_county": site_county or "Not provided",
+                "site_state": site_state or "Not provided",
+                "reference_number": reference_number or "Not provided",
+                "acreage": acreage or "Not provided",
+                "conversation_text": conversation_text
+            }),
             "source": "ElevenLabs"
         }
         
         # Create the event in FollowUp Boss
         result = await client.create_event(event_data)
-        logger.info(f"Created FollowUp Boss event: {result}")
+        logger.info("Created FollowUp Boss event: %s", result)
         
         return {"status": "success", "event_id": result.get("event", {}).get("id")}
         
     except ValueError as e:
-        logger.error(f"FollowUp Boss API error: {e}")
+        logger.error("FollowUp Boss API error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        await client.close()
 
 @app.post("/webhook/generic")
 async def handle_generic_webhook(request: Request):
     """Handle generic webhook payload"""
     try:
         payload = await request.json()
-        logger.info(f"Received generic webhook: {payload}")
+        logger.info("Received generic webhook: %s", payload)
         
         # Process the payload and extract relevant data
         # This is a template - adjust based on your needs
@@ -230,7 +279,7 @@ async def handle_generic_webhook(request: Request):
         return {"status": "received", "payload": payload}
         
     except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
+        logger.error("Error processing webhook: %s", e)
         raise HTTPException(status_code=400, detail="Invalid payload")
 
 @app.get("/health")
@@ -239,4 +288,11 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8001,
+        loop="uvloop",
+        http="httptools",
+        access_log=False
+    )
\ No newline at end of file